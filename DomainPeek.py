@@ -1,11 +1,23 @@
 #!/usr/bin/env python3
-import argparse
 import sys
-import tldextract
-import whois
-import dns.resolver
+import atexit
+import types
+import os
+import asyncio
+import collections
+import concurrent.futures
+import csv
+import dataclasses
+import json
+import functools
+import itertools
+import threading
+import time
+import re
 import socket
-from typing import List, Tuple, Optional, Any, Dict
+from typing import List, Tuple, Optional, Any, Dict, Awaitable, Callable, Deque, Iterable, Iterator
+# tldextract and dnspython are imported inside the functions that use them, so --help,
+# argument errors and cache-only runs don't pay for loading them (and the PSL)
 
 
 # Dictionary of common Selectors for checking DKIM Records 
@@ -34,46 +46,629 @@ KNOWN_PROVIDER_PATTERNS = {
     "google.com": "Google Cloud DNS / Google Workspace",
     "googlehosted.com": "Google Workspace",
     "googledomains.com": "Google Domains",
+    "awsdns-": "Amazon Route 53",
     "azure-dns": "Microsoft Azure DNS",
     "microsoftonline.com": "Microsoft Azure DNS / M365",
     "microsoft.com": "Microsoft Azure DNS / M365"
 }
 
-# Helper function to safely get WHOIS data
-def get_whois_info(domain: str) -> Optional[Any]:
-    """Performs a WHOIS lookup for the domain and handles common errors."""
+# WHOIS keys to try for the registrant and registrar, in order of preference.
+# Only the keys _parse_whois_response and _lookup_rdap produce, older cache entries expire with WHOIS_CACHE_TTL
+_REGISTRANT_KEYS = ('name', 'org')
+_REGISTRAR_KEYS = ('registrar',)
+
+# Result keys, in output order for CSV
+RESULT_FIELDS = ["domain", "registrant", "registrar", "nameservers", "ns_error", "dns_hosting_provider"]
+MAIL_RESULT_FIELDS = ["dmarc", "dmarc_error", "spf", "spf_error", "dkim", "dkim_error"]
+
+# slots=True needs Python 3.10+, older versions fall back to a regular dataclass
+_DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclasses.dataclass(**_DATACLASS_SLOTS)
+class DomainResult:
+    """Results of every lookup for one domain, the mail fields stay None unless -m was used."""
+    domain: str
+    registrant: str = "Not Found"
+    registrar: str = "Not Found"
+    nameservers: Tuple[str, ...] = ()
+    ns_error: Optional[str] = None
+    dns_hosting_provider: str = "Not Found"
+    dmarc: Optional[str] = None
+    dmarc_error: Optional[str] = None
+    spf: Optional[str] = None
+    spf_error: Optional[str] = None
+    dkim: Optional[Dict[str, List[str]]] = None
+    dkim_error: Optional[str] = None
+
+# Default per-query DNS timeout (seconds), bounds how long a hung nameserver can stall the tool
+DNS_TIMEOUT = 2.0
+# Per-attempt limits (seconds), a slow server gets retried rather than using up the whole budget.
+# The last attempt gets whatever is left of the query's timeout, so --dns-timeout can also lengthen it
+DNS_ATTEMPT_TIMEOUTS = (0.5, 0.5, 1.0)
+
+# Public resolvers queried alongside the system resolver (unless --no-public-resolvers), the first answer with records wins
+PUBLIC_RESOLVERS = {
+    "Cloudflare": "1.1.1.1",
+    "Google": "8.8.8.8",
+    "Quad9": "9.9.9.9",
+}
+
+SYSTEM_RESOLVER_LABEL = "System"
+# Seconds the other resolvers get to find records after the system resolver answers NXDOMAIN or empty
+NEGATIVE_ANSWER_GRACE = 0.2
+# Resolvers that timed out (or missed the grace period) in this many races others answered are skipped for the rest of the run
+RESOLVER_MAX_STRIKES = 3
+
+# Shared resolvers as (label, resolver) pairs, created on first use so /etc/resolv.conf is only parsed once per run
+_RESOLVERS: Optional[List[Tuple[str, "dns.asyncresolver.Resolver"]]] = None
+# Resolver label -> consecutive races it timed out in while another resolver answered, reset when it answers
+_RESOLVER_STRIKES: Dict[str, int] = {}
+
+def _get_resolvers(use_public: bool = True) -> List[Tuple[str, "dns.asyncresolver.Resolver"]]:
+    """
+    Returns the module-level resolvers (system first, then PUBLIC_RESOLVERS unless use_public is False),
+    creating them on first call. use_public only applies to the first call.
+    """
+    global _RESOLVERS
+    if _RESOLVERS is None:
+        import dns.asyncresolver
+        import dns.resolver
+        resolvers = []
+        try:
+            system_resolver = dns.asyncresolver.Resolver()
+            system_resolver.rotate = True # Spread retries over the configured nameservers instead of retrying the first
+            resolvers.append((SYSTEM_RESOLVER_LABEL, system_resolver))
+        except dns.resolver.NoResolverConfiguration:
+            pass # No local configuration, the public resolvers still work
+        for label, address in (PUBLIC_RESOLVERS if use_public else {}).items():
+            resolver = dns.asyncresolver.Resolver(configure=False)
+            resolver.nameservers = [address]
+            resolvers.append((f"{label} ({address})", resolver))
+        for _, resolver in resolvers:
+            resolver.timeout = max(DNS_ATTEMPT_TIMEOUTS)
+            resolver.lifetime = DNS_TIMEOUT
+        _RESOLVERS = resolvers
+    return _RESOLVERS
+
+
+# Most DNS queries (one per resolver in a race) in flight at once across every domain, each holds a UDP socket.
+# Keeps a -m batch well under common open file limits (256 on macOS) however high --concurrency is
+DNS_MAX_IN_FLIGHT = 64
+
+# Created on first use in the running event loop, asyncio primitives can't be shared between loops
+_DNS_SEMAPHORE: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+def _get_dns_semaphore() -> asyncio.Semaphore:
+    """Returns the semaphore bounding in-flight DNS queries for the running event loop."""
+    global _DNS_SEMAPHORE
+    loop = asyncio.get_running_loop()
+    if _DNS_SEMAPHORE is None or _DNS_SEMAPHORE[0] is not loop:
+        _DNS_SEMAPHORE = (loop, asyncio.Semaphore(DNS_MAX_IN_FLIGHT))
+    return _DNS_SEMAPHORE[1]
+
+
+# Resolves with our own short, capped attempts instead of dnspython's growing retries within one lifetime
+async def _resolve_with_retries(
+    resolver: "dns.asyncresolver.Resolver", domain: str, record_type: str, max_total: float,
+    on_attempt_timeout: Optional[Callable[[], None]] = None,
+) -> "dns.resolver.Answer":
+    """
+    Tries the query once per DNS_ATTEMPT_TIMEOUTS entry, moving on (and calling on_attempt_timeout) after
+    each attempt's timeout. The last attempt runs until max_total seconds have passed, then dns.resolver.Timeout
+    is raised. Waits for a DNS_MAX_IN_FLIGHT slot first, the time spent queued doesn't count towards max_total.
+    """
+    import dns.resolver
+
+    async with _get_dns_semaphore():
+        deadline = time.monotonic() + max_total
+        last_timeout: Optional[Exception] = None
+        last_attempt = len(DNS_ATTEMPT_TIMEOUTS) - 1
+        for attempt, attempt_timeout in enumerate(DNS_ATTEMPT_TIMEOUTS):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            lifetime = remaining if attempt == last_attempt else min(attempt_timeout, remaining)
+            try:
+                return await resolver.resolve(domain, record_type, raise_on_no_answer=False, lifetime=lifetime)
+            except dns.resolver.Timeout as e:
+                last_timeout = e # Other errors (NXDOMAIN, NoNameservers...) are answers, not slowness, so they propagate
+                if on_attempt_timeout:
+                    on_attempt_timeout()
+    raise last_timeout or dns.resolver.Timeout()
+
+
+def _count_attempt_timeout(attempt_timeouts: Dict[str, int], label: str) -> None:
+    attempt_timeouts[label] = attempt_timeouts.get(label, 0) + 1
+
+
+def _discard_result(task: "asyncio.Future") -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+class _AllResolversFailed(Exception):
+    """Raised when every resolver in the race failed with different errors."""
+
+
+async def _race_resolve(domain: str, record_type: str, timeout: float) -> "dns.resolver.Answer":
+    """
+    Sends the same query to every shared resolver at once and returns the first answer with records.
+    An empty answer or NXDOMAIN from the system resolver is returned after NEGATIVE_ANSWER_GRACE seconds
+    unless another resolver has records by then. Public negative answers are only trusted once every
+    resolver has finished, as a filtering (Quad9) resolver can deny names that exist. Resolvers that
+    time out or fail are ignored unless they all do, in which case their errors are raised.
+    """
+    import dns.resolver
+
+    resolvers = _get_resolvers()
+    if not resolvers:
+        raise _AllResolversFailed("no system resolver is configured and public resolvers are disabled")
+    # Skip resolvers seen timing out while others answered, unless that would leave none
+    resolvers = [(label, resolver) for label, resolver in resolvers if _RESOLVER_STRIKES.get(label, 0) < RESOLVER_MAX_STRIKES] or resolvers
+
+    attempt_timeouts: Dict[str, int] = {}
+    # The resolvers are shared across concurrent queries, so the limits are passed per call rather than set on them
+    tasks = {
+        asyncio.ensure_future(_resolve_with_retries(
+            resolver, domain, record_type, timeout,
+            on_attempt_timeout=functools.partial(_count_attempt_timeout, attempt_timeouts, label),
+        )): label
+        for label, resolver in resolvers
+    }
+    empty_answer: Optional["dns.resolver.Answer"] = None
+    nxdomain: Optional[dns.resolver.NXDOMAIN] = None
+    errors: List[Tuple[str, Exception]] = []
+    answered = set()
+    loop = asyncio.get_running_loop()
+    grace_deadline: Optional[float] = None
+    pending = set(tasks)
+    try:
+        while pending:
+            wait_timeout = None if grace_deadline is None else max(0.0, grace_deadline - loop.time())
+            done, pending = await asyncio.wait(pending, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # Grace period over, the system resolver's negative answer stands and the rest count as timed out
+                for task in pending:
+                    _count_attempt_timeout(attempt_timeouts, tasks[task])
+                break
+            # Check finished tasks in resolver order, so the system resolver's negative answer is the one kept
+            for task in sorted(done, key=list(tasks).index):
+                label = tasks[task]
+                error = task.exception()
+                if not isinstance(error, dns.resolver.Timeout):
+                    answered.add(label)
+                if error is None:
+                    answer = task.result()
+                    if answer.rrset is not None:
+                        return answer
+                    empty_answer = empty_answer or answer
+                elif isinstance(error, dns.resolver.NXDOMAIN):
+                    nxdomain = nxdomain or error
+                else:
+                    errors.append((label, error))
+                    continue
+                if label == SYSTEM_RESOLVER_LABEL and grace_deadline is None:
+                    grace_deadline = loop.time() + NEGATIVE_ANSWER_GRACE
+    finally:
+        for task in tasks:
+            task.cancel()
+            # Mark losing results as retrieved so asyncio doesn't log them, a cancelled query can still finish with an error
+            task.add_done_callback(_discard_result)
+        if answered:
+            for label in tasks.values():
+                if label in answered:
+                    _RESOLVER_STRIKES.pop(label, None)
+                elif attempt_timeouts.get(label):
+                    _RESOLVER_STRIKES[label] = _RESOLVER_STRIKES.get(label, 0) + 1
+
+    # An empty answer means the name exists somewhere, so it wins over another resolver's NXDOMAIN
+    if empty_answer is not None:
+        return empty_answer
+    if nxdomain is not None:
+        raise nxdomain
+    if len({type(error) for _, error in errors}) == 1:
+        raise errors[0][1] # Same failure everywhere, report it as a single resolver would
+    raise _AllResolversFailed("; ".join(f"{label}: {error}" for label, error in errors))
+
+# On-disk WHOIS cache, nameserver owner domains (cloudflare.com, awsdns-*.com etc) recur across runs
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "domainpeek")
+WHOIS_CACHE_PATH = os.path.join(CACHE_DIR, "whois.sqlite3")
+WHOIS_CACHE_TTL = 24 * 60 * 60 # Seconds
+
+# One SQLite connection per run, opened on first use and shared by the WHOIS worker threads.
+# The lock only covers single-row queries, sqlite3 connections can't run statements from two threads at once
+_WHOIS_CACHE_LOCK = threading.Lock()
+_WHOIS_CACHE: Optional["sqlite3.Connection"] = None
+_WHOIS_CACHE_PRUNED = False
+
+def _get_whois_cache() -> "sqlite3.Connection":
+    """Returns the cache database connection, creating the file and table on first call. Call with the lock held."""
+    global _WHOIS_CACHE
+    if _WHOIS_CACHE is None:
+        import sqlite3
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Autocommit, every write is its own short transaction so concurrent runs only wait briefly
+        connection = sqlite3.connect(WHOIS_CACHE_PATH, timeout=5, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA synchronous=NORMAL") # A lost write only costs a repeat lookup
+        connection.execute("CREATE TABLE IF NOT EXISTS whois (domain TEXT PRIMARY KEY, stored REAL NOT NULL, result TEXT NOT NULL)")
+        # WHOIS server per TLD from IANA, a NULL server means IANA lists none
+        connection.execute("CREATE TABLE IF NOT EXISTS tld_servers (tld TEXT PRIMARY KEY, stored REAL NOT NULL, server TEXT)")
+        atexit.register(connection.close)
+        _WHOIS_CACHE = connection
+    return _WHOIS_CACHE
+
+def _read_whois_cache(domain: str, ttl: float) -> Optional[Dict[str, Any]]:
+    """Returns the cached WHOIS result for the domain if it is younger than ttl seconds."""
+    try:
+        with _WHOIS_CACHE_LOCK:
+            row = _get_whois_cache().execute(
+                "SELECT result FROM whois WHERE domain = ? AND stored > ?", (domain, time.time() - ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    except Exception: # Missing or unreadable cache just means a cache miss
+        return None
+
+def _write_whois_cache(domain: str, result: Dict[str, Any], ttl: float = WHOIS_CACHE_TTL) -> None:
+    """Stores a WHOIS result in the on-disk cache, failures are ignored. The first write of a run prunes expired entries."""
+    global _WHOIS_CACHE_PRUNED
+    try:
+        with _WHOIS_CACHE_LOCK:
+            cache = _get_whois_cache()
+            if not _WHOIS_CACHE_PRUNED:
+                _WHOIS_CACHE_PRUNED = True
+                # Never below the default, a short --cache-ttl shouldn't empty the cache for normal runs
+                cache.execute("DELETE FROM whois WHERE stored < ?", (time.time() - max(ttl, WHOIS_CACHE_TTL),))
+            cache.execute("INSERT OR REPLACE INTO whois VALUES (?, ?, ?)", (domain, time.time(), json.dumps(result)))
+    except Exception:
+        pass
+
+# Offline tldextract instance, suffix_list_urls=() skips the publicsuffix.org fetch and uses
+# the Public Suffix List snapshot bundled with tldextract
+_TLDX: Optional["tldextract.TLDExtract"] = None
+
+def _get_tldx() -> "tldextract.TLDExtract":
+    """Returns the module-level TLDExtract instance, creating it on first call."""
+    global _TLDX
+    if _TLDX is None:
+        import tldextract
+        _TLDX = tldextract.TLDExtract(
+            cache_dir=os.path.join(CACHE_DIR, "tld"),
+            include_psl_private_domains=True,
+            suffix_list_urls=(),
+        )
+    return _TLDX
+
+# WHOIS servers for common TLDs (from the IANA root zone database), others are looked up via whois.iana.org
+TLD_WHOIS_SERVERS: Dict[str, Optional[str]] = {
+    "com": "whois.verisign-grs.com",
+    "net": "whois.verisign-grs.com",
+    "org": "whois.publicinterestregistry.org",
+    "info": "whois.nic.info",
+    "biz": "whois.nic.biz",
+    "io": "whois.nic.io",
+    "me": "whois.nic.me",
+    "us": "whois.nic.us",
+    "dev": "whois.nic.google",
+    "app": "whois.nic.google",
+    "uk": "whois.nic.uk",
+    "au": "whois.auda.org.au",
+    "nz": "whois.irs.net.nz",
+    "ca": "whois.cira.ca",
+    "eu": "whois.eu",
+    "de": "whois.denic.de",
+    "fr": "whois.nic.fr",
+    "nl": "whois.domain-registry.nl",
+}
+IANA_WHOIS_SERVER = "whois.iana.org"
+WHOIS_PORT = 43
+WHOIS_TIMEOUT = 3.0 # Seconds, for the whole query
+
+# WHOIS response labels -> keys of the returned dict, the parser pattern is built from this table once
+_WHOIS_FIELDS = {
+    "registrar": "registrar",
+    "registrar name": "registrar", # .au
+    "registrar_name": "registrar", # .nz
+    "registrar url": "registrar_url",
+    "registrar whois server": "referral",
+    "registrant": "name",
+    "registrant name": "name",
+    "registrant_contact_name": "name", # .nz
+    "registrant organization": "org",
+}
+# One combined pattern so a response is scanned a single time, longest labels first. The value is either on the
+# label's line or, for registries using indented blocks (.uk, .eu, .nl), on the next indented line ('Name: ' for .eu)
+_WHOIS_FIELD_RE = re.compile(
+    r'^[ \t]*(?P<k>' + '|'.join(label.replace(' ', r'[ \t]+') for label in sorted(_WHOIS_FIELDS, key=len, reverse=True)) + r'):[ \t]*'
+    r'(?:(?P<v>\S[^\r\n]*?)|\r?\n[ \t]+(?:Name:[ \t]*)?(?P<block>\S[^\r\n]*?))[ \t]*\r?$',
+    re.M | re.I
+)
+_IANA_WHOIS_RE = re.compile(r'^whois:\s*(\S+)', re.M | re.I)
+
+# Sends a single RFC 3912 query (TCP port 43) and returns the raw response
+def _whois_query(server: str, query: str, timeout: float = WHOIS_TIMEOUT) -> str:
+    """Queries the WHOIS server, raising socket.timeout if the response takes longer than timeout seconds."""
+    deadline = time.monotonic() + timeout
+    chunks = []
+    with socket.create_connection((server, WHOIS_PORT), timeout=timeout) as sock:
+        sock.sendall(query.encode('idna') + b"\r\n")
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout(f"no complete response from {server} within {timeout}s")
+            sock.settimeout(remaining)
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b"".join(chunks).decode('utf-8', errors='replace')
+
+# IANA answers are kept in the cache database for this long, the root zone's WHOIS servers rarely change
+TLD_SERVER_CACHE_TTL = 7 * 24 * 60 * 60 # Seconds
+# TLD -> error of a failed IANA query, re-raised for the rest of the run instead of waiting on IANA again
+_IANA_FAILURES: Dict[str, Exception] = {}
+# One lock per TLD, so concurrent lookups under an unknown TLD share a single IANA query
+_IANA_LOCKS: Dict[str, threading.Lock] = {}
+
+def get_tld_whois_server(tld: str) -> Optional[str]:
+    """
+    Returns the WHOIS server for the TLD. TLDs not in TLD_WHOIS_SERVERS are looked up in the cache database,
+    then asked of IANA and stored there. A failed IANA query raises the same error for the rest of the run.
+    """
+    tld = tld.lower()
+    if tld in TLD_WHOIS_SERVERS:
+        return TLD_WHOIS_SERVERS[tld]
+    with _IANA_LOCKS.setdefault(tld, threading.Lock()):
+        if tld not in TLD_WHOIS_SERVERS:
+            if tld in _IANA_FAILURES:
+                raise _IANA_FAILURES[tld]
+            found, server = _read_tld_server_cache(tld)
+            if not found:
+                try:
+                    match = _IANA_WHOIS_RE.search(_whois_query(IANA_WHOIS_SERVER, tld))
+                except OSError as e: # Timeouts and connection failures
+                    _IANA_FAILURES[tld] = e
+                    raise
+                server = match.group(1) if match else None
+                _write_tld_server_cache(tld, server)
+            TLD_WHOIS_SERVERS[tld] = server
+    return TLD_WHOIS_SERVERS[tld]
+
+def _read_tld_server_cache(tld: str) -> Tuple[bool, Optional[str]]:
+    """Returns (found, server) for a fresh cached IANA answer, server may be None when IANA lists no server."""
+    try:
+        with _WHOIS_CACHE_LOCK:
+            row = _get_whois_cache().execute(
+                "SELECT server FROM tld_servers WHERE tld = ? AND stored > ?", (tld, time.time() - TLD_SERVER_CACHE_TTL)
+            ).fetchone()
+    except Exception: # Missing or unreadable cache just means a cache miss
+        return False, None
+    return (True, row[0]) if row else (False, None)
+
+def _write_tld_server_cache(tld: str, server: Optional[str]) -> None:
+    """Stores an IANA answer in the cache database, failures are ignored."""
     try:
-        # timeout parameter might not be supported by all underlying whois libs/servers
-        # The default whois library might follow redirects, which can be slow.
-        return whois.whois(domain)
-    except whois.exceptions.UnknownTld:
-        print(f"Warning: WHOIS lookup failed for '{domain}'. Unknown TLD.")
+        with _WHOIS_CACHE_LOCK:
+            _get_whois_cache().execute("INSERT OR REPLACE INTO tld_servers VALUES (?, ?, ?)", (tld, time.time(), server))
+    except Exception:
+        pass
+
+def _parse_whois_response(text: str) -> Tuple[Dict[str, str], Optional[str]]:
+    """Returns the registrar/registrant fields found in a WHOIS response and the referral server, if any."""
+    fields: Dict[str, str] = {}
+    for match in _WHOIS_FIELD_RE.finditer(text):
+        label = ' '.join(match.group('k').lower().split()) # Normalise case and spacing to look up the table
+        fields.setdefault(_WHOIS_FIELDS[label], match.group('v') or match.group('block')) # First occurrence wins
+    referral = fields.pop('referral', None)
+    if referral:
+        referral = referral.split('://')[-1].strip('/').lower()
+    return fields, referral
+
+# RDAP (structured JSON WHOIS) is tried before port 43, IANA's list of RDAP servers per TLD is kept alongside the WHOIS cache
+RDAP_BOOTSTRAP_PATH = os.path.join(CACHE_DIR, "rdap-bootstrap.json")
+RDAP_BOOTSTRAP_MAX_AGE = 7 # Days, the IANA registry changes rarely
+RDAP_BOOTSTRAP_TIMEOUT = 3.0 # Seconds, for fetching every bootstrap file
+# Written when bootstrapping fails, runs within RDAP_BOOTSTRAP_RETRY_AFTER seconds of it skip RDAP
+RDAP_BOOTSTRAP_FAILED_PATH = os.path.join(CACHE_DIR, "rdap-bootstrap.failed")
+RDAP_BOOTSTRAP_RETRY_AFTER = 60 * 60
+
+# RDAP entity roles -> keys of the returned dict, matching the ones _parse_whois_response produces
+_RDAP_ROLES = {
+    "registrar": "registrar",
+    "registrant": "name",
+}
+
+# Bootstrapping is done once per run, by whichever worker thread needs it first
+_RDAP_LOCK = threading.Lock()
+_RDAP: Optional[types.ModuleType] = None
+_RDAP_BOOTSTRAPPED = False
+
+def _get_rdap() -> Optional[types.ModuleType]:
+    """Returns the bootstrapped whoisit module, or None if RDAP is unavailable (not installed or bootstrap failed)."""
+    global _RDAP, _RDAP_BOOTSTRAPPED
+    with _RDAP_LOCK:
+        if not _RDAP_BOOTSTRAPPED:
+            _RDAP_BOOTSTRAPPED = True # A failed bootstrap is not retried for every domain
+            _RDAP = _bootstrap_rdap()
+    return _RDAP
+
+def _bootstrap_rdap() -> Optional[types.ModuleType]:
+    """
+    Loads whoisit's bootstrap data from disk, fetching and saving a fresh copy if it is missing or stale.
+    A stale copy stays in use when the refresh fails.
+    """
+    try:
+        import whoisit
+        from whoisit.bootstrap import Bootstrap
+    except ImportError: # whoisit needs Python 3.10+, older installs use port 43 only
         return None
-    except whois.exceptions.WhoisCommandFailed as e:
-        print(f"Warning: WHOIS command execution failed for '{domain}': {e}")
+    except OSError: # e.g. too many open files while its dependencies load, port 43 still works
         return None
-    except whois.exceptions.PywhoisError as e: # General catch-all for the library
-        print(f"Warning: WHOIS lookup error for '{domain}': {e}")
+    # Per HTTP request. whoisit retries failed requests and follows the registry's link to the registrar,
+    # so an RDAP lookup can take a few times this, unlike the hard bound on a port 43 query
+    whoisit.utils.http_timeout = WHOIS_TIMEOUT
+    try:
+        with open(RDAP_BOOTSTRAP_PATH, encoding='utf-8') as f:
+            whoisit.load_bootstrap_data(f.read())
+        if not whoisit.bootstrap_is_older_than(RDAP_BOOTSTRAP_MAX_AGE):
+            return whoisit
+    except Exception: # Missing or unreadable copy
+        whoisit.clear_bootstrapping()
+
+    try:
+        # A recent failure (e.g. data.iana.org blocked) is remembered across runs, so they don't all wait on it
+        if time.time() - os.path.getmtime(RDAP_BOOTSTRAP_FAILED_PATH) < RDAP_BOOTSTRAP_RETRY_AFTER:
+            return whoisit if whoisit.is_bootstrapped() else None
+    except OSError: # No marker
+        pass
+
+    # Fetched into a separate instance so the loaded copy is only replaced once the refresh has succeeded,
+    # and a refresh that overruns can't change it from the background
+    fresh = Bootstrap()
+    if not _run_with_deadline(fresh.bootstrap, RDAP_BOOTSTRAP_TIMEOUT):
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(RDAP_BOOTSTRAP_FAILED_PATH, 'w', encoding='utf-8'):
+                pass
+        except OSError:
+            pass
+        return whoisit if whoisit.is_bootstrapped() else None
+    data = fresh.save_bootstrap_data()
+    whoisit.clear_bootstrapping()
+    whoisit.load_bootstrap_data(data)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(RDAP_BOOTSTRAP_PATH, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.remove(RDAP_BOOTSTRAP_FAILED_PATH)
+    except OSError: # Includes there being no failure marker to remove
+        pass
+    return whoisit
+
+def _run_with_deadline(func: Callable[[], Any], timeout: float) -> bool:
+    """
+    Runs func in a daemon thread, returning True if it finished without raising within timeout seconds.
+    A call that overruns is left to finish in the background and its outcome ignored.
+    """
+    outcome: List[bool] = []
+    def target() -> None:
+        try:
+            func()
+            outcome.append(True)
+        except Exception:
+            outcome.append(False)
+    thread = threading.Thread(target=target, name="rdap-bootstrap", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return bool(outcome and outcome[0])
+
+def _lookup_rdap(domain: str) -> Optional[Dict[str, str]]:
+    """Performs an RDAP lookup for the domain, returning None so port 43 is tried when RDAP has no answer."""
+    rdap = _get_rdap()
+    if rdap is None:
+        return None
+    domain = get_registrable_domain(domain) or domain
+    try:
+        # Follows the registry's link to the registrar's RDAP server, where thin registries keep the registrant
+        response = rdap.domain(domain)
+    except Exception: # UnsupportedError for TLDs without RDAP, QueryError for HTTP failures
         return None
+    fields: Dict[str, str] = {}
+    entities = response.get('entities', {})
+    for role, key in _RDAP_ROLES.items():
+        name = next((entity['name'] for entity in entities.get(role, ()) if entity.get('name')), None)
+        if name:
+            fields[key] = name
+    return fields or None
+
+# Helper function to safely get WHOIS data
+@functools.lru_cache(maxsize=1024)
+def get_whois_info(domain: str, use_cache: bool = True, cache_ttl: float = WHOIS_CACHE_TTL) -> Optional[Dict[str, str]]:
+    """
+    Returns WHOIS data for the domain, served from the on-disk cache when a fresh entry exists.
+    Lookups try RDAP first and fall back to port 43 WHOIS when the TLD has no RDAP service.
+    Results are also memoised in-process so repeated lookups within a run are free.
+    """
+    domain = domain.lower()
+    if use_cache:
+        cached = _read_whois_cache(domain, cache_ttl)
+        if cached is not None:
+            return cached
+
+    result = _lookup_rdap(domain) or _lookup_whois(domain)
+    if result and use_cache: # Empty responses (rate limits, no match) are not worth keeping
+        _write_whois_cache(domain, result, cache_ttl)
+    return result
+
+def _lookup_whois(domain: str) -> Optional[Dict[str, str]]:
+    """Performs a WHOIS lookup for the domain and handles common errors."""
+    # Registries only know the registrable domain, not hosts under it
+    domain = get_registrable_domain(domain) or domain
+    server = None
+    try:
+        server = get_tld_whois_server(domain.rsplit('.', 1)[-1])
+        if not server:
+            print(f"Warning: WHOIS lookup failed for '{domain}'. Unknown TLD.", file=sys.stderr)
+            return None
+        # Verisign matches hostnames too unless the query asks for an exact domain match
+        query = f"={domain}" if server == "whois.verisign-grs.com" else domain
+        fields, referral = _parse_whois_response(_whois_query(server, query))
+
+        # Thin registries (.com/.net) only hold the registrar, registrant details live with the registrar
+        if referral and referral != server and 'name' not in fields and 'org' not in fields:
+            server = referral
+            referral_fields, _ = _parse_whois_response(_whois_query(server, domain))
+            for key, value in referral_fields.items():
+                fields.setdefault(key, value)
+        return fields
     except socket.timeout:
-        print(f"Warning: WHOIS lookup for '{domain}' timed out.")
+        print(f"Warning: WHOIS lookup for '{domain}' timed out.", file=sys.stderr)
+        return None
+    except OSError as e: # DNS failure, connection refused/reset etc
+        print(f"Warning: WHOIS query to '{server}' failed for '{domain}': {e}", file=sys.stderr)
         return None
     except Exception as e: # Catch any other unexpected errors
-        print(f"Warning: An unexpected error occurred during WHOIS lookup for '{domain}': {e}")
+        print(f"Warning: An unexpected error occurred during WHOIS lookup for '{domain}': {e}", file=sys.stderr)
         return None
 
+# Thread pool for the blocking WHOIS lookups, shared by every domain in the run
+WHOIS_WORKERS = 4
+_EXECUTOR: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+def _get_executor(max_workers: int = WHOIS_WORKERS) -> concurrent.futures.ThreadPoolExecutor:
+    """Returns the module-level WHOIS executor, max_workers only applies to the first call."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="whois")
+    return _EXECUTOR
+
+# Lookups currently running, so concurrent requests for the same owner domain share one query
+_WHOIS_IN_FLIGHT: Dict[Tuple[str, bool, float], "asyncio.Future[Optional[Dict[str, str]]]"] = {}
+
+# Runs the blocking WHOIS lookup in the shared thread pool
+async def get_whois_info_async(domain: str, use_cache: bool = True, cache_ttl: float = WHOIS_CACHE_TTL) -> Optional[Dict[str, str]]:
+    """Awaitable wrapper around get_whois_info so it can run alongside DNS queries."""
+    key = (domain.lower(), use_cache, cache_ttl)
+    future = _WHOIS_IN_FLIGHT.get(key)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_get_executor(), get_whois_info, domain, use_cache, cache_ttl)
+        _WHOIS_IN_FLIGHT[key] = future
+        # Once finished, get_whois_info's lru_cache answers repeat lookups
+        future.add_done_callback(lambda _: _WHOIS_IN_FLIGHT.pop(key, None))
+    return await future
+
 # Helper function to get DNS records
-def get_dns_records(domain: str, record_type: str) -> Tuple[List[str], Optional[str]]:
+async def get_dns_records(domain: str, record_type: str, timeout: float = DNS_TIMEOUT) -> Tuple[List[str], Optional[str]]:
     """
     Performs a DNS lookup for the specified record type and handles common errors.
     Returns a list of record strings and an optional error message.
     """
+    import dns.resolver
+
     records = []
     error_msg = None
     try:
-        resolver = dns.resolver.Resolver()
-        # resolver.nameservers = ['8.8.8.8', '1.1.1.1']
-        answer = resolver.resolve(domain, record_type, raise_on_no_answer=False) # Don't raise, check rrset
+        answer = await _race_resolve(domain, record_type, timeout) # Doesn't raise on no answer, check rrset
 
         if answer.rrset is None:
             # Handles CNAMEs implicitly for A/AAAA lookups
@@ -81,7 +676,7 @@ def get_dns_records(domain: str, record_type: str) -> Tuple[List[str], Optional[
             if record_type == 'NS':
                  # Check if it's possibly a CNAME pointing elsewhere
                  try:
-                     cname_answer = resolver.resolve(domain, 'CNAME')
+                     cname_answer = await _race_resolve(domain, 'CNAME', timeout)
                      if cname_answer.rrset:
                           cname_target = cname_answer.rrset[0].to_text().rstrip('.')
                           error_msg = f"No direct {record_type} records found, but found CNAME: {cname_target}"
@@ -110,7 +705,9 @@ def get_dns_records(domain: str, record_type: str) -> Tuple[List[str], Optional[
     except dns.resolver.NoNameservers:
         error_msg = f"Could not contact nameservers for '{domain}'."
     except dns.resolver.Timeout:
-        error_msg = f"DNS query for {record_type} records of '{domain}' timed out."
+        error_msg = f"DNS query for {record_type} records of '{domain}' timed out after {timeout}s."
+    except _AllResolversFailed as e:
+        error_msg = f"All resolvers failed for {record_type} records of '{domain}': {e}"
     except Exception as e:
         error_msg = f"An unexpected DNS error occurred for '{domain}' ({record_type}): {e}"
 
@@ -120,21 +717,110 @@ def get_dns_records(domain: str, record_type: str) -> Tuple[List[str], Optional[
     return records, error_msg
 
 
+# Parent zone -> (expiry, addresses of its nameservers), so batch runs only resolve each parent once.
+# An empty list means resolving failed, it expires after PARENT_FAILURE_TTL so a transient error isn't kept for the run
+_PARENT_SERVERS: Dict[str, Tuple[float, List[str]]] = {}
+PARENT_FAILURE_TTL = 30.0 # Seconds
+# Parent zones being resolved, so the concurrent domains under one zone share the lookup
+_PARENT_IN_FLIGHT: Dict[str, "asyncio.Future[List[str]]"] = {}
+
+async def _get_parent_servers(zone: str, timeout: float) -> List[str]:
+    """Returns the addresses of the zone's nameservers (shared, reordered as servers time out), or [] if none resolved."""
+    cached = _PARENT_SERVERS.get(zone)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    future = _PARENT_IN_FLIGHT.get(zone)
+    if future is None:
+        future = asyncio.ensure_future(_resolve_parent_servers(zone, timeout))
+        _PARENT_IN_FLIGHT[zone] = future
+        future.add_done_callback(lambda _: _PARENT_IN_FLIGHT.pop(zone, None))
+    return await future
+
+async def _resolve_parent_servers(zone: str, timeout: float) -> List[str]:
+    """Resolves every nameserver of the zone to an address, in NS order, and records them in _PARENT_SERVERS."""
+    servers, _ = await get_dns_records(zone, 'NS', timeout)
+    results = await asyncio.gather(*(get_dns_records(server, 'A', timeout) for server in servers))
+    addresses = [records[0] for records, _ in results if records]
+    _PARENT_SERVERS[zone] = (float('inf') if addresses else time.monotonic() + PARENT_FAILURE_TTL, addresses)
+    return addresses
+
+# Gets NS records straight from the parent zone instead of through the recursive resolvers
+async def get_authoritative_ns(domain: str, timeout: float = DNS_TIMEOUT) -> Tuple[List[str], Optional[str]]:
+    """
+    Asks a nameserver of the parent zone (e.g. the .com servers for example.com) for the domain's
+    delegation, a single UDP round trip once the parent servers are known. A server that times out
+    is moved to the back of the list and the next one is tried, following the DNS_ATTEMPT_TIMEOUTS
+    schedule. Falls back to the recursive get_dns_records lookup for subdomains or if the direct query fails.
+    """
+    registrable_domain = get_registrable_domain(domain)
+    if registrable_domain == domain and '.' in domain:
+        parent_zone = domain.split('.', 1)[1]
+        import dns.asyncquery
+        import dns.exception
+        import dns.flags
+        import dns.message
+        import dns.name
+        import dns.rdatatype
+
+        try:
+            servers = await _get_parent_servers(parent_zone, timeout)
+            query = dns.message.make_query(domain, 'NS')
+            response = None
+            deadline = time.monotonic() + timeout
+            last_attempt = min(len(servers), len(DNS_ATTEMPT_TIMEOUTS)) - 1
+            for attempt, (server, attempt_timeout) in enumerate(zip(list(servers), DNS_ATTEMPT_TIMEOUTS)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    async with _get_dns_semaphore():
+                        response = await dns.asyncquery.udp(
+                            query, server, timeout=remaining if attempt == last_attempt else min(attempt_timeout, remaining)
+                        )
+                    break
+                except dns.exception.Timeout:
+                    if server in servers: # Later domains try the responsive servers first
+                        servers.remove(server)
+                        servers.append(server)
+            if response is not None and not response.flags & dns.flags.TC: # Truncated referrals go through the resolvers instead
+                qname = dns.name.from_text(domain)
+                nameservers = [
+                    rdata.target.to_text().rstrip('.')
+                    for rrset in response.answer + response.authority # Referrals carry NS in authority
+                    if rrset.rdtype == dns.rdatatype.NS and rrset.name == qname
+                    for rdata in rrset
+                ]
+                if nameservers:
+                    return nameservers, None
+        except Exception:
+            pass # Fall back to the recursive lookup below
+    return await get_dns_records(domain, 'NS', timeout)
+
+
 # Helper function to extract primary value from WHOIS results
 def get_primary_whois_value(data: Optional[Any]) -> str:
     """Gets the primary string value from WHOIS result (handles lists/None)."""
     if data is None:
         return "Not Found"
     if isinstance(data, list):
-        # Often the first item is the primary one, filter empty strings
-        filtered_list = [item for item in data if isinstance(item, str) and item.strip()]
-        return filtered_list[0] if filtered_list else "Not Found"
+        # Often the first item is the primary one, skip empty strings and stop at the first hit
+        return next((item.strip() for item in data if isinstance(item, str) and item.strip()), "Not Found")
     elif isinstance(data, str):
-        return data.strip() if data.strip() else "Not Found"
+        return data.strip() or "Not Found"
     else:
         return str(data) # Fallback
 
-# Extracts Registrable Domain using tldextract
+# Returns the first usable value for a list of candidate WHOIS keys
+def _first(data: Any, keys: Tuple[str, ...]) -> str:
+    """Returns the primary value of the first key in keys that has one, or "Not Found"."""
+    for key in keys:
+        value = get_primary_whois_value(data.get(key))
+        if value != "Not Found":
+            return value
+    return "Not Found"
+
+# Extracts Registrable Domain using tldextract, memoised as the same NS hosts recur across domains
+@functools.lru_cache(maxsize=4096)
 def get_registrable_domain(fqdn: str) -> Optional[str]:
     """
     Extracts the registrable domain (e.g., example.com, example.co.uk)
@@ -143,21 +829,48 @@ def get_registrable_domain(fqdn: str) -> Optional[str]:
     if not fqdn:
         return None
     try:
-        ext = tldextract.extract(fqdn, include_psl_private_domains=True)
+        ext = _get_tldx()(fqdn)
         if ext.registered_domain:
              return ext.registered_domain
         else:
-            print(f"Warning: Could not extract registrable domain from '{fqdn}'")
+            print(f"Warning: Could not extract registrable domain from '{fqdn}'", file=sys.stderr)
             return None
     except Exception as e:
-        print(f"Error using tldextract on {fqdn}: {e}")
+        print(f"Error using tldextract on {fqdn}: {e}", file=sys.stderr)
         return None
 
 
+# Matches nameserver hostnames against KNOWN_PROVIDER_PATTERNS
+def match_known_provider(nameservers: List[str]) -> Optional[str]:
+    """
+    Returns the provider name for the first known pattern found in the nameservers, or None.
+    Overrides WHOIS inference for cases where the Nameservers include the DNS Hosting Provider but the
+    Nameserver's Registrar is different, e.g. ns1.microsoftonline.com shows MarkMonitor Inc as the
+    Registrar but Microsoft Azure DNS / M365 is the DNS Management Platform.
+    """
+    for nameserver in nameservers:
+        ns_lower = nameserver.lower()
+        for pattern, provider_name in KNOWN_PROVIDER_PATTERNS.items():
+            if pattern in ns_lower:
+                return provider_name
+    return None
+
+# Describes the DNS Hosting Provider from the WHOIS of a nameserver's owner domain
+def infer_provider_from_whois(ns_owner_domain: str, ns_domain_whois: Optional[Any]) -> str:
+    """Returns the inferred provider (registrar, falling back to org) for the NS owner domain."""
+    if not ns_domain_whois:
+        return f"Inferred: WHOIS Lookup Failed for {ns_owner_domain}"
+    inferred_provider = get_primary_whois_value(ns_domain_whois.get('registrar'))
+    if inferred_provider != "Not Found":
+        return f"Inferred: {inferred_provider} (Registrar)"
+    org = get_primary_whois_value(ns_domain_whois.get('org'))
+    return f"Inferred: {org} (Org)" if org != "Not Found" else "Inferred: Registrar/Org Not Found in WHOIS"
+
+
 # SPF check (filters TXT)
-def check_spf(domain: str) -> Tuple[Optional[str], Optional[str]]:
+async def check_spf(domain: str, timeout: float = DNS_TIMEOUT) -> Tuple[Optional[str], Optional[str]]:
     """Checks for SPF record (TXT starting with 'v=spf1')."""
-    txt_records, error_msg = get_dns_records(domain, 'TXT')
+    txt_records, error_msg = await get_dns_records(domain, 'TXT', timeout)
     if error_msg and not txt_records:
         return None, error_msg # Return error if lookup failed entirely
 
@@ -182,7 +895,7 @@ def check_spf(domain: str) -> Tuple[Optional[str], Optional[str]]:
     return spf_record, None # Return found record, no error
 
 
-def check_common_dkim(domain: str) -> Tuple[Dict[str, List[str]], Optional[str]]:
+async def check_common_dkim(domain: str, timeout: float = DNS_TIMEOUT) -> Tuple[Dict[str, List[str]], Optional[str]]:
     """
     Checks for DKIM TXT records using a list of common selectors.
     Returns a dictionary of found {selector: [records]} and an optional general error message.
@@ -191,10 +904,12 @@ def check_common_dkim(domain: str) -> Tuple[Dict[str, List[str]], Optional[str]]
     found_dkim: Dict[str, List[str]] = {}
     general_error: Optional[str] = None
 
-    for selector in COMMON_DKIM_SELECTORS:
-        dkim_domain = f"{selector}._domainkey.{domain}"
-        records, error_msg = get_dns_records(dkim_domain, 'TXT')
+    # Query every selector at once, results come back in COMMON_DKIM_SELECTORS order
+    results = await asyncio.gather(
+        *(get_dns_records(f"{selector}._domainkey.{domain}", 'TXT', timeout) for selector in COMMON_DKIM_SELECTORS)
+    )
 
+    for selector, (records, error_msg) in zip(COMMON_DKIM_SELECTORS, results):
         if records:
             found_dkim[selector] = records
         elif error_msg:
@@ -207,13 +922,57 @@ def check_common_dkim(domain: str) -> Tuple[Dict[str, List[str]], Optional[str]]
     return found_dkim, general_error
 
 
+# Option values used when no flags are given, shared by the argparse defaults and the fast path in main
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    "input_file": None,
+    "concurrency": 32,
+    "format": "text",
+    "mail_authentication": False,
+    "dns_timeout": DNS_TIMEOUT,
+    "no_public_resolvers": False,
+    "authoritative": False,
+    "no_cache": False,
+    "cache_ttl": WHOIS_CACHE_TTL,
+}
+
+
 def main():
+    # Fast path for the common `domainpeek example.com`, argparse is only imported when flags are used
+    if len(sys.argv) == 2 and not sys.argv[1].startswith('-'):
+        domain_to_check = sys.argv[1].lower().strip() # Normalize domain
+        if domain_to_check:
+            asyncio.run(amain([domain_to_check], types.SimpleNamespace(**DEFAULT_OPTIONS)))
+            return
+
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    # Domains are read lazily, so a large input file is never held in memory all at once
+    domains = itertools.chain(
+        (d for d in (arg.lower().strip() for arg in args.domain) if d), # Normalize domains
+        read_domains_file(args.input_file) if args.input_file else (),
+    )
+    first_domain = next(domains, None)
+    if first_domain is None:
+        parser.error("provide at least one domain or an --input-file")
+
+    asyncio.run(amain(itertools.chain([first_domain], domains), args))
+
+
+def build_parser():
+    """Builds the command line parser, defaults come from DEFAULT_OPTIONS."""
+    import argparse # Deferred, the single domain fast path in main doesn't need it
+
     parser = argparse.ArgumentParser(
         description="""
 Get DNS and WHOIS info for a domain using Python libraries.
 Optionally check common email authentication records (SPF, DMARC, DKIM).
 
 Outputs basic info by default. Use -m for Email Authentication checks.
+Several domains (or an --input-file) are processed concurrently, use
+--format json/csv for machine readable output.
 
 Default Output Definitions:
   - Registrant: The person or organisation who registered the domain.
@@ -234,37 +993,177 @@ Email Authentication (-m) Definitions:
 """,
         formatter_class=argparse.RawTextHelpFormatter
     )
-    parser.add_argument("domain", help="The domain name to check (e.g., example.com)")
+    parser.add_argument("domain", nargs='*', help="The domain name(s) to check (e.g., example.com)")
+    parser.add_argument(
+        "-i", "--input-file",
+        help="Read additional domains from a file, one per line ('-' reads from stdin)."
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=DEFAULT_OPTIONS["concurrency"],
+        help=f"Maximum number of domains processed at the same time (default: {DEFAULT_OPTIONS['concurrency']})."
+    )
+    parser.add_argument(
+        "-f", "--format",
+        choices=["text", "json", "csv"],
+        default=DEFAULT_OPTIONS["format"],
+        help="Output format: human readable text, JSON lines or CSV (default: text)."
+    )
     parser.add_argument(
         "-m", "--mail-authentication",
         action="store_true", # Set to True if flag is present
         help="Check for SPF, DMARC and DKIM records."
     )
-    args = parser.parse_args()
-    domain_to_check = args.domain.lower().strip() # Normalize domain
+    parser.add_argument(
+        "--dns-timeout",
+        type=float,
+        default=DEFAULT_OPTIONS["dns_timeout"],
+        help=f"Seconds to wait for each DNS query before giving up (default: {DNS_TIMEOUT})."
+    )
+    parser.add_argument(
+        "--no-public-resolvers",
+        action="store_true",
+        help="Only use the system resolver, don't send queries to Cloudflare, Google and Quad9."
+    )
+    parser.add_argument(
+        "-a", "--authoritative",
+        action="store_true",
+        help="Read nameservers from the parent zone's servers instead of the recursive resolvers."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Bypass the on-disk WHOIS cache ({WHOIS_CACHE_PATH})."
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_OPTIONS["cache_ttl"],
+        help=f"Seconds a cached WHOIS result stays valid (default: {WHOIS_CACHE_TTL})."
+    )
+    return parser
 
-    print(f"--- Checking Domain: {domain_to_check} ---\n")
+
+# Reads domains from a file (one per line, '#' comments allowed), '-' reads from stdin
+def read_domains_file(path: str) -> Iterator[str]:
+    """Yields the normalised domains listed in the file, one line at a time."""
+    if path == '-':
+        yield from _domains_from_lines(sys.stdin)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _domains_from_lines(f)
+
+def _domains_from_lines(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        domain = line.split('#', 1)[0].strip().lower()
+        if domain:
+            yield domain
+
+
+async def amain(domains: Iterable[str], args) -> None:
+    """
+    Processes every domain with at most args.concurrency in flight, writing results in input order.
+    Only a window of 2 * args.concurrency domains is taken from domains at a time, so tasks
+    (and pending results) stay bounded however long the input is.
+    """
+    # WHOIS lookups block, give the pool enough threads to keep up with the domains in flight
+    _get_executor(max(WHOIS_WORKERS, args.concurrency))
+    _get_resolvers(use_public=not args.no_public_resolvers)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(domain: str) -> DomainResult:
+        async with semaphore:
+            return await process_domain(domain, args)
+
+    fieldnames = RESULT_FIELDS + (MAIL_RESULT_FIELDS if args.mail_authentication else [])
+    csv_writer = None
+    if args.format == 'csv':
+        csv_writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames)
+        csv_writer.writeheader()
+
+    def write(index: int, result: DomainResult) -> None:
+        if args.format == 'json':
+            print(json.dumps(result_to_row(result, fieldnames), default=str), flush=True)
+        elif csv_writer:
+            csv_writer.writerow(result_to_row(result, fieldnames, flatten=True))
+            sys.stdout.flush()
+        else:
+            if index:
+                print()
+            print_text_report(result)
+
+    # Results are written as the oldest task finishes, a slow domain holds back at most the window behind it
+    window: Deque["asyncio.Task[DomainResult]"] = collections.deque()
+    written = 0
+    for domain in domains:
+        window.append(asyncio.ensure_future(bounded(domain)))
+        if len(window) >= 2 * args.concurrency:
+            write(written, await window.popleft())
+            written += 1
+    while window:
+        write(written, await window.popleft())
+        written += 1
+
+
+async def process_domain(domain_to_check: str, args) -> DomainResult:
+    """Runs every lookup for one domain and returns the results."""
+    # The domain WHOIS and the NS lookup are independent, so run them concurrently.
+    # The WHOIS on the nameservers' owner domains is chained on as soon as NS returns.
+    use_cache = not args.no_cache
+    whois_task = asyncio.create_task(get_whois_info_async(domain_to_check, use_cache, args.cache_ttl))
+    if args.authoritative:
+        ns_task = asyncio.create_task(get_authoritative_ns(domain_to_check, args.dns_timeout))
+    else:
+        ns_task = asyncio.create_task(get_dns_records(domain_to_check, 'NS', args.dns_timeout))
+
+    if args.mail_authentication:
+        # Email Authentication records only depend on the domain, start them straight away too
+        dmarc_domain = f"_dmarc.{domain_to_check}"
+        dmarc_task = asyncio.create_task(get_dns_records(dmarc_domain, 'TXT', args.dns_timeout))
+        spf_task = asyncio.create_task(check_spf(domain_to_check, args.dns_timeout))
+        dkim_task = asyncio.create_task(check_common_dkim(domain_to_check, args.dns_timeout))
+
+    # Get Nameservers (NS Records) via DNS
+    nameservers, ns_error_msg = await ns_task
+
+    # Group the nameservers by owner domain so each provider is only looked up once
+    ns_groups: Dict[Optional[str], List[str]] = {}
+    if not ns_error_msg:
+        for nameserver in nameservers:
+            ns_groups.setdefault(get_registrable_domain(nameserver), []).append(nameserver)
+
+    # Get Registrar of each Nameserver's Owner Domain via WHOIS
+    # This helps identify the hosting provider (often the registrar of the NS domain)
+    own_domain = get_registrable_domain(domain_to_check)
+    providers: Dict[str, Optional[str]] = {} # Owner domain (or nameserver if unknown) -> provider, in NS order
+    ns_whois_tasks: Dict[str, Awaitable[Optional[Any]]] = {}
+    for ns_owner_domain, owner_nameservers in ns_groups.items():
+        provider_name = match_known_provider(owner_nameservers)
+        if provider_name:
+            providers[ns_owner_domain or owner_nameservers[0]] = provider_name
+        elif not ns_owner_domain:
+            providers[owner_nameservers[0]] = "Inferred: Could not determine owner domain from NS"
+        else:
+            # No known pattern matched, start the WHOIS inference while the domain WHOIS finishes
+            providers[ns_owner_domain] = None
+            if ns_owner_domain == own_domain:
+                # Self-hosted DNS (e.g. ns1.example.com for example.com), reuse the domain's own WHOIS
+                ns_whois_tasks[ns_owner_domain] = whois_task
+            else:
+                ns_whois_tasks[ns_owner_domain] = asyncio.create_task(get_whois_info_async(ns_owner_domain, use_cache, args.cache_ttl))
 
     # Get Domain Registrant & Registrar via WHOIS
-    domain_whois = get_whois_info(domain_to_check)
+    domain_whois = await whois_task
 
     registrant = "Not Found"
     registrar = "Not Found"
 
     if domain_whois:
-        # Try common attributes for registrant name/org
-        registrant_name = get_primary_whois_value(domain_whois.get('name') or domain_whois.get('registrant_name'))
-        registrant_org = get_primary_whois_value(domain_whois.get('org') or domain_whois.get('registrant_organization'))
-
-        if registrant_name != "Not Found":
-            registrant = registrant_name
-        elif registrant_org != "Not Found":
-             registrant = registrant_org # Use Org if name not found
-        else:
-             registrant = "Not Found" # Explicitly state if neither found
-
-        # Registrar is usually more consistent
-        registrar = get_primary_whois_value(domain_whois.get('registrar'))
+        # Registrant name is preferred, organisation is used if no name is found
+        registrant = _first(domain_whois, _REGISTRANT_KEYS)
+        registrar = _first(domain_whois, _REGISTRAR_KEYS)
         # Fallback
         if registrar == "Not Found":
             url = get_primary_whois_value(domain_whois.get('registrar_url'))
@@ -275,80 +1174,92 @@ Email Authentication (-m) Definitions:
         registrant = "WHOIS Lookup Failed"
         registrar = "WHOIS Lookup Failed"
 
-    print(f"Domain Registrant: {registrant}")
-    print(f"Domain Registrar: {registrar}")
+    ns_whois_results = await asyncio.gather(*ns_whois_tasks.values())
+    for ns_owner_domain, ns_domain_whois in zip(ns_whois_tasks, ns_whois_results):
+        providers[ns_owner_domain] = infer_provider_from_whois(ns_owner_domain, ns_domain_whois)
 
-    # Get Nameservers (NS Records) via DNS
-    nameservers, ns_error_msg = get_dns_records(domain_to_check, 'NS')
-
-    first_nameserver = None
-    if ns_error_msg:
-        print(f"Error: {ns_error_msg}")
-    elif nameservers:
-        print(f"Nameservers: {', '.join(nameservers)}")
-        first_nameserver = nameservers[0]
+    # Owners with the same provider (e.g. awsdns-01.com and awsdns-02.net) are merged, so
+    # owner=provider pairs are only listed when the providers actually differ
+    owners_by_provider: Dict[str, List[str]] = {}
+    for owner, provider in providers.items():
+        owners_by_provider.setdefault(provider, []).append(owner)
+    if not owners_by_provider:
+        dns_hosting_provider = "Skipped (No nameserver found)"
+    elif len(owners_by_provider) == 1:
+        dns_hosting_provider = next(iter(owners_by_provider))
     else:
-        # Should be covered by error msg, but just in case
-        print("No nameservers identified.")
+        dns_hosting_provider = ", ".join(f"{'/'.join(owners)}={provider}" for provider, owners in owners_by_provider.items())
 
+    result = DomainResult(
+        domain=domain_to_check,
+        registrant=registrant,
+        registrar=registrar,
+        nameservers=tuple(nameservers),
+        ns_error=ns_error_msg,
+        dns_hosting_provider=dns_hosting_provider,
+    )
 
-    # Get Registrar of the Nameserver's Owner Domain via WHOIS
-    # This helps identify the hosting provider (often the registrar of the NS domain)
-    dns_hosting_provider = "Not Found / Unable to Determine" # Default value
+    if args.mail_authentication:
+        # DMARC Check, keep the first DMARC record found
+        dmarc_records, dmarc_error = await dmarc_task
+        result.dmarc = dmarc_records[0] if dmarc_records else None
+        result.dmarc_error = dmarc_error if not dmarc_records else None
 
-    # Set Overridden state for cases where Nameservers include the DNS Hosting Provider but the Nameserver's Registrar is different
-    # E.G. ns1.microsoftonline.com shows MarkMonitor Inc as the Registrar but Microsoft Azure DNS / M365 is the DNS Management Platform
-    provider_detected = False # Use a clearer flag name
+        # SPF Check using helper function
+        result.spf, result.spf_error = await spf_task
 
-    if first_nameserver:
-        ns_lower = first_nameserver.lower()
+        # DKIM Check (Using Common Selectors)
+        result.dkim, result.dkim_error = await dkim_task
 
-        # Check known provider patterns using the dictionary
-        for pattern, provider_name in KNOWN_PROVIDER_PATTERNS.items():
-            if pattern in ns_lower:
-                dns_hosting_provider = provider_name # Assign the detected provider name
-                provider_detected = True
-                break # Found a match, no need to check further patterns
-
-        # If no known pattern matched, fallback to WHOIS inference
-        if not provider_detected:
-            ns_owner_domain = get_registrable_domain(first_nameserver)
-            if ns_owner_domain:
-                ns_domain_whois = get_whois_info(ns_owner_domain)
-                if ns_domain_whois:
-                    inferred_provider = get_primary_whois_value(ns_domain_whois.get('registrar'))
-                    if inferred_provider == "Not Found":
-                         org = get_primary_whois_value(ns_domain_whois.get('org'))
-                         dns_hosting_provider = f"Inferred: {org} (Org)" if org != "Not Found" else "Inferred: Registrar/Org Not Found in WHOIS"
-                    else:
-                         dns_hosting_provider = f"Inferred: {inferred_provider} (Registrar)"
-                else:
-                    dns_hosting_provider = f"Inferred: WHOIS Lookup Failed for {ns_owner_domain}"
-            else:
-                dns_hosting_provider = "Inferred: Could not determine owner domain from NS"
+    return result
+
+
+# Picks the output fields from a result, optionally flattening list/dict values for a single CSV row
+def result_to_row(result: DomainResult, fieldnames: List[str], flatten: bool = False) -> Dict[str, Any]:
+    """Returns the result as a dict limited to fieldnames, with nameservers space separated and DKIM JSON encoded if flatten."""
+    data = dataclasses.asdict(result)
+    row = {field: data[field] for field in fieldnames}
+    if flatten:
+        row["nameservers"] = " ".join(result.nameservers)
+        if "dkim" in row:
+            row["dkim"] = json.dumps(result.dkim) if result.dkim else ""
+    return row
+
+
+def print_text_report(result: DomainResult) -> None:
+    """Prints the human readable report for one domain result."""
+    domain_to_check = result.domain
+    print(f"--- Checking Domain: {domain_to_check} ---\n")
+
+    print(f"Domain Registrant: {result.registrant}")
+    print(f"Domain Registrar: {result.registrar}")
+
+    if result.ns_error:
+        print(f"Error: {result.ns_error}")
+    elif result.nameservers:
+        print(f"Nameservers: {', '.join(result.nameservers)}")
     else:
-        dns_hosting_provider = "Skipped (No nameserver found)"
+        # Should be covered by error msg, but just in case
+        print("No nameservers identified.")
 
-    print(f"DNS Hosting Provider: {dns_hosting_provider}")
+    print(f"DNS Hosting Provider: {result.dns_hosting_provider}")
 
-    if args.mail_authentication:
+    if result.dkim is not None: # Email Authentication was checked
         print("\n--- Email Authentication ---")
 
         # DMARC Check
         dmarc_domain = f"_dmarc.{domain_to_check}"
-        dmarc_records, dmarc_error = get_dns_records(dmarc_domain, 'TXT')
-        if dmarc_error and not dmarc_records: print(f"\nDMARC ({dmarc_domain}): \nError - {dmarc_error}")
-        elif dmarc_records: print(f"\nDMARC ({dmarc_domain}): \n{dmarc_records[0]}") # Display first DMARC found
+        if result.dmarc_error: print(f"\nDMARC ({dmarc_domain}): \nError - {result.dmarc_error}")
+        elif result.dmarc: print(f"\nDMARC ({dmarc_domain}): \n{result.dmarc}")
         else: print(f"\nDMARC ({dmarc_domain}): \nNot Found")
 
-        # SPF Check using helper function
-        spf_record, spf_error = check_spf(domain_to_check)
-        if spf_error: print(f"\nSPF ({domain_to_check}): \nError - {spf_error}")
-        elif spf_record: print(f"\nSPF ({domain_to_check}): \n{spf_record}")
+        # SPF Check
+        if result.spf_error: print(f"\nSPF ({domain_to_check}): \nError - {result.spf_error}")
+        elif result.spf: print(f"\nSPF ({domain_to_check}): \n{result.spf}")
         else: print(f"\nSPF ({domain_to_check}): \nNot Found")
 
         # DKIM Check (Using Common Selectors)
-        found_dkim, dkim_general_error = check_common_dkim(domain_to_check)
+        found_dkim, dkim_general_error = result.dkim, result.dkim_error
         if dkim_general_error:
             print(f"\nDKIM: \n{dkim_general_error}") # Report general lookup errors if any
         if found_dkim:
@@ -363,4 +1274,4 @@ Email Authentication (-m) Definitions:
     print(f"\n--- Check Complete for: {domain_to_check} ---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -22,7 +22,7 @@ setuptools.setup(
     name="domain-peek-tool",
     version="1.1",
     author="Thegen Jackson",
-    description="Get DNS, WHOIS, and basic Email Authentication (SPF, DMARC, common DKIM Selectors) info using python-whois and dnspython.",
+    description="Get DNS, WHOIS, and basic Email Authentication (SPF, DMARC, common DKIM Selectors) info using dnspython, RDAP and direct WHOIS (RFC 3912) queries.",
     long_description=get_long_description(),
     long_description_content_type="text/markdown",
     url="https://github.com/nulltree-software/domainpeek",